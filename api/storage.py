@@ -0,0 +1,214 @@
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional, Any
+import os
+import sqlite3
+import sys
+import threading
+from utils.csv_utils import load_users_from_csv, save_users_to_csv
+
+USER_FIELDS = [
+    "user_id", "first_name", "last_name", "dob", "address_1", "address_2",
+    "city", "state", "zip", "phone", "email"
+]
+
+CSV_FILE_PATH = os.path.join(os.path.dirname(__file__), '../data/users.csv')
+SQLITE_FILE_PATH = os.path.join(os.path.dirname(__file__), '../data/users.db')
+
+
+class UserStore(ABC):
+    """
+    Storage interface behind the users API. Users are dicts of USER_FIELDS
+    with string values, listed in insertion order. Lookups return None and
+    mutations return False when the user_id is missing (or, for add, already
+    taken); api/users.py turns those into HTTP errors.
+    """
+
+    @abstractmethod
+    def list_users(self) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def add_user(self, user: Dict[str, Any]) -> bool:
+        ...
+
+    @abstractmethod
+    def delete_user(self, user_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    def update_user(self, user: Dict[str, Any]) -> bool:
+        ...
+
+
+class CsvUserStore(UserStore):
+    """The original single-file backend. Every call reads, and every write rewrites, the whole CSV."""
+
+    def __init__(self, file_path: str = CSV_FILE_PATH):
+        self.file_path = file_path
+
+    def list_users(self) -> List[Dict[str, Any]]:
+        return load_users_from_csv(self.file_path)
+
+    def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        users = load_users_from_csv(self.file_path)
+        return next((user for user in users if int(user['user_id']) == user_id), None)
+
+    def add_user(self, user: Dict[str, Any]) -> bool:
+        users = load_users_from_csv(self.file_path)
+        if any(int(existing['user_id']) == int(user['user_id']) for existing in users):
+            return False
+        users.append(user)
+        save_users_to_csv(self.file_path, users)
+        return True
+
+    def delete_user(self, user_id: int) -> bool:
+        users = load_users_from_csv(self.file_path)
+        new_users = [user for user in users if int(user['user_id']) != user_id]
+        if len(new_users) == len(users):
+            return False
+        save_users_to_csv(self.file_path, new_users)
+        return True
+
+    def update_user(self, user: Dict[str, Any]) -> bool:
+        users = load_users_from_csv(self.file_path)
+        for index, existing in enumerate(users):
+            if int(existing['user_id']) == int(user['user_id']):
+                users[index] = user
+                save_users_to_csv(self.file_path, users)
+                return True
+        return False
+
+
+class SqliteUserStore(UserStore):
+    """
+    SQLite backend in WAL mode, safe to share between uvicorn workers: readers
+    never block each other or the single writer, and each write touches one
+    row instead of rewriting the file. Connections are per thread because
+    FastAPI runs sync endpoints in a thread pool. All statements are fixed,
+    parameterised SQL so sqlite3 reuses the prepared statements from its cache.
+    The position column keeps users listed in insertion order, like the CSV file.
+    """
+
+    _COLUMNS = ", ".join(USER_FIELDS)
+    _PLACEHOLDERS = ", ".join("?" for _ in USER_FIELDS)
+    _NEXT_POSITION = "(SELECT COALESCE(MAX(position), 0) + 1 FROM users)"
+
+    CREATE_TABLE = (
+        "CREATE TABLE IF NOT EXISTS users (user_id INTEGER PRIMARY KEY, "
+        + ", ".join(f"{field} TEXT NOT NULL DEFAULT ''" for field in USER_FIELDS[1:])
+        + ", position INTEGER NOT NULL)"
+    )
+    CREATE_POSITION_INDEX = "CREATE INDEX IF NOT EXISTS users_position ON users (position)"
+    SELECT_ALL = f"SELECT {_COLUMNS} FROM users ORDER BY position"
+    SELECT_ONE = f"SELECT {_COLUMNS} FROM users WHERE user_id = ?"
+    INSERT = f"INSERT INTO users ({_COLUMNS}, position) VALUES ({_PLACEHOLDERS}, {_NEXT_POSITION})"
+    INSERT_OR_REPLACE = (f"INSERT OR REPLACE INTO users ({_COLUMNS}, position) "
+                         f"VALUES ({_PLACEHOLDERS}, {_NEXT_POSITION})")
+    DELETE = "DELETE FROM users WHERE user_id = ?"
+    UPDATE = ("UPDATE users SET " + ", ".join(f"{field} = ?" for field in USER_FIELDS[1:])
+              + " WHERE user_id = ?")
+
+    def __init__(self, db_path: str = SQLITE_FILE_PATH, seed_csv_path: Optional[str] = CSV_FILE_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        conn = self._connection()
+        with conn:
+            conn.execute(self.CREATE_TABLE)
+            conn.execute(self.CREATE_POSITION_INDEX)
+        # A fresh database is seeded from the CSV so switching backends keeps the data.
+        if seed_csv_path and os.path.exists(seed_csv_path):
+            if conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0:
+                self.import_csv(seed_csv_path)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row_to_user(row: sqlite3.Row) -> Dict[str, Any]:
+        # Values are returned as strings, matching what the CSV backend reads back.
+        user = dict(row)
+        user["user_id"] = str(user["user_id"])
+        return user
+
+    @staticmethod
+    def _row_values(user: Dict[str, Any]) -> List[Any]:
+        return [int(user["user_id"])] + [str(user.get(field) or "") for field in USER_FIELDS[1:]]
+
+    def list_users(self) -> List[Dict[str, Any]]:
+        return [self._row_to_user(row) for row in self._connection().execute(self.SELECT_ALL)]
+
+    def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(self.SELECT_ONE, (user_id,)).fetchone()
+        return self._row_to_user(row) if row else None
+
+    def add_user(self, user: Dict[str, Any]) -> bool:
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute(self.INSERT, self._row_values(user))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def delete_user(self, user_id: int) -> bool:
+        conn = self._connection()
+        with conn:
+            return conn.execute(self.DELETE, (user_id,)).rowcount > 0
+
+    def update_user(self, user: Dict[str, Any]) -> bool:
+        values = self._row_values(user)
+        conn = self._connection()
+        with conn:
+            return conn.execute(self.UPDATE, values[1:] + values[:1]).rowcount > 0
+
+    def import_csv(self, csv_path: str) -> int:
+        """Loads every user from a CSV file, replacing rows with the same user_id. Returns the row count."""
+        users = load_users_from_csv(csv_path)
+        conn = self._connection()
+        with conn:
+            conn.executemany(self.INSERT_OR_REPLACE, [self._row_values(user) for user in users])
+        return len(users)
+
+    def export_csv(self, csv_path: str) -> int:
+        """Writes every user to a CSV file in the format CsvUserStore reads. Returns the row count."""
+        users = self.list_users()
+        save_users_to_csv(csv_path, users)
+        return len(users)
+
+
+def create_store() -> UserStore:
+    """
+    Builds the store selected by the USERS_STORAGE environment variable:
+    "csv" (default) or "sqlite". USERS_CSV_PATH and USERS_DB_PATH override
+    the file locations.
+    """
+    backend = os.getenv("USERS_STORAGE", "csv").lower()
+    csv_path = os.getenv("USERS_CSV_PATH", CSV_FILE_PATH)
+    if backend == "csv":
+        return CsvUserStore(csv_path)
+    if backend == "sqlite":
+        return SqliteUserStore(os.getenv("USERS_DB_PATH", SQLITE_FILE_PATH), seed_csv_path=csv_path)
+    raise ValueError(f"Unknown USERS_STORAGE backend: {backend}")
+
+
+if __name__ == "__main__":
+    # python -m api.storage import|export <csv_path> [<db_path>]
+    if len(sys.argv) < 3 or sys.argv[1] not in ("import", "export"):
+        print("Usage: python -m api.storage import|export <csv_path> [<db_path>]")
+        sys.exit(1)
+    store = SqliteUserStore(sys.argv[3] if len(sys.argv) > 3 else SQLITE_FILE_PATH, seed_csv_path=None)
+    if sys.argv[1] == "import":
+        print(f"Imported {store.import_csv(sys.argv[2])} users into {store.db_path}")
+    else:
+        print(f"Exported {store.export_csv(sys.argv[2])} users to {sys.argv[2]}")
@@ -1,10 +1,10 @@
 from typing import List, Optional
 from fastapi import HTTPException
 from pydantic import BaseModel
-import os
-from utils.csv_utils import load_users_from_csv, save_users_to_csv
+from api.storage import create_store, USER_FIELDS
 
-CSV_FILE_PATH = os.path.join(os.path.dirname(__file__), '../data/users.csv')
+# Backend chosen at import time from USERS_STORAGE ("csv" or "sqlite"), see api/storage.py.
+store = create_store()
 
 
 class User(BaseModel):
@@ -22,43 +22,42 @@ class User(BaseModel):
 
 
 def get_users():
-    return load_users_from_csv(CSV_FILE_PATH)
+    return store.list_users()
 
 
 def get_user(user_id: int):
     print(f"Incoming user_id : {user_id}")
-    users = load_users_from_csv(CSV_FILE_PATH)
-    print(users)
-    user = next((user for user in users if int(user['user_id']) == user_id), None)
+    user = store.get_user(user_id)
     print(user)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
+def _check_fields(user: dict):
+    # Only USER_FIELDS are stored (SQLite would drop the rest), so reject anything else up front.
+    if "user_id" not in user:
+        raise HTTPException(status_code=400, detail="user_id is required")
+    unknown = sorted(set(user) - set(USER_FIELDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown user fields: {unknown}")
+
+
 def add_user(new_user: dict):
-    users = load_users_from_csv(CSV_FILE_PATH)
-    if any(int(user['user_id']) == int(new_user['user_id']) for user in users):
+    _check_fields(new_user)
+    if not store.add_user(new_user):
         raise HTTPException(status_code=400, detail="User ID already exists")
-    users.append(new_user)
-    save_users_to_csv(CSV_FILE_PATH, users)
-    return new_user
+    return store.get_user(int(new_user['user_id']))
 
 
 def delete_user(user_id: int):
-    users = load_users_from_csv(CSV_FILE_PATH)
-    new_users = [user for user in users if int(user['user_id']) != user_id]
-    if len(new_users) == len(users):
+    if not store.delete_user(user_id):
         raise HTTPException(status_code=404, detail="User not found")
-    save_users_to_csv(CSV_FILE_PATH, new_users)
     return {"detail": "User deleted"}
 
 
 def update_user(updated_user: dict):
-    users = load_users_from_csv(CSV_FILE_PATH)
-    for index, user in enumerate(users):
-        if int(user['user_id']) == int(updated_user['user_id']):
-            users[index] = updated_user
-            save_users_to_csv(CSV_FILE_PATH, users)
-            return updated_user
-    raise HTTPException(status_code=404, detail="User not found")
+    _check_fields(updated_user)
+    if not store.update_user(updated_user):
+        raise HTTPException(status_code=404, detail="User not found")
+    return store.get_user(int(updated_user['user_id']))
@@ -0,0 +1,98 @@
+"""
+Startup-time benchmark for the clients, the users API and the MCP servers.
+
+Each entry point is imported in a fresh interpreter several times and the
+median wall time is reported. Nothing is served and no MCP server or LLM is
+contacted, so this measures import and module-level initialisation only;
+use `--profile-startup` on an entry point for the per-import breakdown.
+
+Results can be saved as a baseline and later runs compared against it,
+failing (exit code 1) when an entry point gets slower than the tolerance or
+no longer imports at all:
+    python benchmarks/startup_time.py --save-baseline
+    python benchmarks/startup_time.py --tolerance 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_baseline.json")
+
+ENTRY_POINTS = [
+    "mcp_client_cli",
+    "mcp_client_ui",
+    "users_api",
+    "servers.math_server",
+    "servers.northwind_server",
+    "servers.users_api_server",
+    "servers.weather_server",
+]
+
+
+def measure(module: str, runs: int) -> float:
+    """Median milliseconds to start an interpreter and import `module`."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], cwd=REPO_ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup-time benchmark for the repository's entry points.")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per entry point (default: 5).")
+    parser.add_argument("--tolerance", type=float, default=20.0,
+                        help="Allowed slowdown against the baseline, in percent (default: 20).")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Write results to {BASELINE_PATH}.")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH) and not args.save_baseline:
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    # Interpreter start-up on its own, to separate it from the entry points' cost.
+    results = {"<python>": measure("sys", args.runs)}
+    regressions = []
+    failures = []
+    print(f"{'entry point':<28}{'median ms':>10}{'baseline':>10}{'change':>9}")
+    print(f"{'<python>':<28}{results['<python>']:>10.1f}")
+    for module in ENTRY_POINTS:
+        try:
+            results[module] = measure(module, args.runs)
+        except subprocess.CalledProcessError:
+            print(f"{module:<28}{'failed to import':>10}")
+            failures.append(module)
+            continue
+        line = f"{module:<28}{results[module]:>10.1f}"
+        if module in baseline:
+            change = (results[module] - baseline[module]) / baseline[module] * 100
+            line += f"{baseline[module]:>10.1f}{change:>+8.1f}%"
+            if change > args.tolerance:
+                regressions.append(module)
+        print(line)
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, mode="w", encoding="utf-8") as f:
+            json.dump({name: round(ms, 1) for name, ms in results.items()}, f, indent=2)
+        print(f"\nBaseline written to {BASELINE_PATH}")
+    # An entry point missing from the baseline may just lack optional dependencies here;
+    # one that was measured before and now fails to import is a regression.
+    broken = [module for module in failures if module in baseline]
+    if broken:
+        print(f"\nEntry points in the baseline that failed to import: {', '.join(broken)}")
+    if regressions:
+        print(f"\nStartup regressions over {args.tolerance:.0f}%: {', '.join(regressions)}")
+    if broken or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
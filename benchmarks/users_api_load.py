@@ -0,0 +1,127 @@
+"""
+Multi-worker read load benchmark for users_api.py.
+
+Starts `uvicorn users_api:app --workers N` against a throwaway copy of the
+user data for each storage backend and worker count, hammers
+GET /users/{user_id} from several client processes for a fixed duration, and
+prints requests/second and error counts.
+
+Run from the repository root:
+    python benchmarks/users_api_load.py --workers 1 2 4 --backends csv sqlite
+"""
+import argparse
+import csv
+import http.client
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_ROOT)
+
+from api.storage import USER_FIELDS  # noqa: E402
+
+
+def write_sample_csv(path: str, num_users: int):
+    """Writes num_users synthetic users with ids 1..num_users."""
+    with open(path, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=USER_FIELDS)
+        writer.writeheader()
+        for user_id in range(1, num_users + 1):
+            row = {field: f"{field}-{user_id}" for field in USER_FIELDS}
+            row["user_id"] = user_id
+            writer.writerow(row)
+
+
+def wait_until_ready(port: int, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/users/1")
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start within {timeout}s")
+
+
+def client_worker(port: int, num_users: int, duration: float, queue):
+    """
+    Issues GET /users/{id} requests until the duration elapses. Each request
+    uses a new connection, like servers/users_api_server.py does with plain
+    requests.get(); keep-alive connections to a multi-worker uvicorn also hit
+    ~40 ms Nagle/delayed-ACK stalls that would hide the storage cost.
+    """
+    ok = errors = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        try:
+            conn.request("GET", f"/users/{random.randint(1, num_users)}")
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                ok += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+        finally:
+            conn.close()
+    queue.put((ok, errors))
+
+
+def run_case(backend: str, workers: int, args, port: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "users.csv")
+        write_sample_csv(csv_path, args.users)
+        env = dict(os.environ, USERS_STORAGE=backend, USERS_CSV_PATH=csv_path,
+                   USERS_DB_PATH=os.path.join(tmp, "users.db"))
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "users_api:app", "--port", str(port),
+             "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+            cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_ready(port)
+            queue = multiprocessing.Queue()
+            clients = [multiprocessing.Process(target=client_worker, args=(port, args.users, args.duration, queue))
+                       for _ in range(args.clients)]
+            for client in clients:
+                client.start()
+            totals = [queue.get() for _ in clients]
+            for client in clients:
+                client.join()
+        finally:
+            server.terminate()
+            server.wait()
+    ok = sum(t[0] for t in totals)
+    errors = sum(t[1] for t in totals)
+    return ok / args.duration, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-worker read load benchmark for the users API.")
+    parser.add_argument("--backends", nargs="+", default=["csv", "sqlite"], choices=["csv", "sqlite"])
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent client processes (default: 8).")
+    parser.add_argument("--users", type=int, default=1000, help="Users in the generated data set (default: 1000).")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per case (default: 10).")
+    parser.add_argument("--port", type=int, default=8900)
+    args = parser.parse_args()
+
+    print(f"{'backend':<10}{'workers':>8}{'req/s':>12}{'errors':>8}")
+    for backend in args.backends:
+        for workers in args.workers:
+            rate, errors = run_case(backend, workers, args, args.port)
+            print(f"{backend:<10}{workers:>8}{rate:>12.1f}{errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
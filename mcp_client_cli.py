@@ -1,18 +1,28 @@
-import getpass
+from utils import startup_profile
+
+startup_profile.start()
+
 import os
 import asyncio
+import argparse
+import json
+import math
+import statistics
+import time
 from dotenv import load_dotenv
-from typing import List
+from typing import TYPE_CHECKING, List, Dict, Any, Set
+
+from utils.tool_plan import PlanError, parse_plan, validate_plan, execute_plan
 
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langchain_mcp_adapters.tools import load_mcp_tools
-from langchain.chat_models import init_chat_model
-from langchain.agents import AgentExecutor, create_tool_calling_agent
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.tools import BaseTool
+# The LangChain stack is imported inside the functions that use it so that
+# --help, argument errors and batch resume checks do not pay for it.
+if TYPE_CHECKING:
+    from langchain.agents import AgentExecutor
+    from langchain_core.tools import BaseTool
 
 # Load environment variables for API keys and other secrets
-load_dotenv()
+with startup_profile.phase("load .env"):
+    load_dotenv()
 
 # --- Configuration ---
 # Define the connection parameters for each of your MCP servers.
@@ -36,10 +46,22 @@ mcp_servers_config = {
 }
 
 
-async def create_agent_with_mcp_tools() -> AgentExecutor:
+def create_llm():
+    """Initializes the chat model shared by the agent loop and the plan executor."""
+    from langchain.chat_models import init_chat_model
+
+    return init_chat_model("gemini-2.0-flash", model_provider="google_genai", temperature=0)
+
+
+async def create_agent_with_mcp_tools(verbose: bool = True) -> "AgentExecutor":
     """
     Initializes the MCP client, loads tools from all servers, and creates an agent.
     """
+    with startup_profile.phase("import LangChain stack"):
+        from langchain_mcp_adapters.client import MultiServerMCPClient
+        from langchain.agents import AgentExecutor, create_tool_calling_agent
+        from langchain_core.prompts import ChatPromptTemplate
+
     print("Initializing MultiServerMCPClient...")
 
     # Create the client instance.
@@ -47,11 +69,13 @@ async def create_agent_with_mcp_tools() -> AgentExecutor:
 
     print("Loading tools from all connected MCP servers...")
     # This is the corrected line. Call get_tools() directly on the client instance.
-    tools: List[BaseTool] = await client.get_tools()
+    with startup_profile.phase("load MCP tools"):
+        tools: List["BaseTool"] = await client.get_tools()
     print(f"Successfully loaded {len(tools)} tools: {[tool.name for tool in tools]}")
 
     # Initialize your LLM
-    llm = init_chat_model("gemini-2.0-flash", model_provider="google_genai", temperature=0)
+    with startup_profile.phase("initialize LLM"):
+        llm = create_llm()
 
     # The enhanced prompt is still crucial for guiding the agent's behavior.
     prompt = ChatPromptTemplate.from_messages(
@@ -73,33 +97,349 @@ async def create_agent_with_mcp_tools() -> AgentExecutor:
         ]
     )
 
-    # Create the tool-calling agent with the loaded tools and LLM
-    agent = create_tool_calling_agent(llm, tools, prompt)
+    with startup_profile.phase("build agent"):
+        # Create the tool-calling agent with the loaded tools and LLM
+        agent = create_tool_calling_agent(llm, tools, prompt)
 
-    # Create the AgentExecutor to run the agent
-    agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+        # Create the AgentExecutor to run the agent
+        # Intermediate steps are returned so batch mode can record the tool calls made.
+        agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=verbose, return_intermediate_steps=True)
 
     return agent_executor
 
 
-async def main():
+# --- Plan mode ---
+# Instead of one LLM round trip per dependent tool call, the model is asked once
+# for a DAG of tool calls, the client runs it, and the model is asked once more
+# for the final answer. If no valid plan comes back the agent loop is used.
+
+PLAN_SYSTEM_PROMPT = (
+    "You plan tool calls for a user's question. Available tools:\n{tools}\n\n"
+    "Reply with ONLY a JSON object of the form "
+    '{{"steps": [{{"id": "user", "tool": "get_one_user", "args": {{"user_id": 101}}}}, '
+    '{{"id": "weather", "tool": "get_weather", "args": {{"location": "$user.city"}}}}]}}. '
+    "An argument value of the form \"$<step id>.<field>\" is replaced by that field of the "
+    "earlier step's result; steps that do not reference each other run in parallel. "
+    "Use only the tools listed above. If no tool is needed, reply with {{\"steps\": []}}."
+)
+
+ANSWER_SYSTEM_PROMPT = (
+    "You are a helpful AI assistant. Answer the user's question directly and concisely "
+    "using the tool results below. If a tool call failed, say what could not be determined.\n\n"
+    "Tool results:\n{results}"
+)
+
+
+def create_llm_call_counter():
+    """
+    Returns a callback handler whose `calls` attribute counts chat model
+    invocations, used to compare plan mode with the agent loop.
+    """
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMCallCounter(BaseCallbackHandler):
+        def __init__(self):
+            self.calls = 0
+
+        def on_chat_model_start(self, serialized, messages, **kwargs):
+            self.calls += 1
+
+        def on_llm_start(self, serialized, prompts, **kwargs):
+            self.calls += 1
+
+    return LLMCallCounter()
+
+
+def describe_tools(tools: List["BaseTool"]) -> str:
+    """Renders tool names, descriptions and argument schemas for the planning prompt."""
+    lines = []
+    for tool in tools:
+        summary = (tool.description or "").strip().split("\n")[0]
+        lines.append(f"- {tool.name}({json.dumps(tool.args)}): {summary}")
+    return "\n".join(lines)
+
+
+async def answer_with_plan(agent_executor: "AgentExecutor", llm, query: str,
+                           callbacks: List[Any] = None) -> Dict[str, Any]:
+    """
+    Answers a query with one planning call, a client-side run of the planned
+    tool DAG, and one answering call. Returns the answer as "output", the
+    tool calls in the batch-mode record format, and the mode actually used.
+    """
+    config = {"callbacks": callbacks or []}
+    tools = {tool.name: tool for tool in agent_executor.tools}
+
+    plan_message = await llm.ainvoke(
+        [("system", PLAN_SYSTEM_PROMPT.format(tools=describe_tools(agent_executor.tools))), ("human", query)],
+        config=config,
+    )
+    try:
+        steps = parse_plan(plan_message.content)
+        validate_plan(steps, set(tools))
+    except PlanError as e:
+        print(f"No usable plan ({e}); falling back to the agent loop.")
+        response = await agent_executor.ainvoke({"input": query}, config=config)
+        return {"output": response["output"],
+                "tool_calls": format_tool_calls(response.get("intermediate_steps", [])),
+                "mode": "agent"}
+
+    # An empty plan means no tool is needed, so this goes straight to the answer call.
+    records = await execute_plan(steps, tools)
+    results = json.dumps(records, default=str, indent=2) if records else "(no tools were needed)"
+    answer_message = await llm.ainvoke(
+        [("system", ANSWER_SYSTEM_PROMPT.format(results=results)),
+         ("human", query)],
+        config=config,
+    )
+    tool_calls = [
+        {"tool": record["tool"], "args": record["args"],
+         "result": record["error"] if record["error"] else str(record["result"])}
+        for record in records.values()
+    ]
+    return {"output": answer_message.content, "tool_calls": tool_calls, "mode": "plan"}
+
+
+async def compare_modes(agent_executor: "AgentExecutor", llm, query: str):
+    """Runs a query through the agent loop and plan mode and prints LLM calls and wall time for each."""
+    rows = []
+
+    counter = create_llm_call_counter()
+    start = time.perf_counter()
+    response = await agent_executor.ainvoke({"input": query}, config={"callbacks": [counter]})
+    rows.append(("agent loop", counter.calls, time.perf_counter() - start, response["output"]))
+
+    counter = create_llm_call_counter()
+    start = time.perf_counter()
+    result = await answer_with_plan(agent_executor, llm, query, callbacks=[counter])
+    rows.append((f"plan ({result['mode']})", counter.calls, time.perf_counter() - start, result["output"]))
+
+    print(f"\nUser Query: {query}")
+    print(f"{'mode':<16}{'LLM calls':>10}{'wall time':>12}")
+    for name, calls, wall_time, _ in rows:
+        print(f"{name:<16}{calls:>10}{wall_time:>11.2f}s")
+    for name, _, _, output in rows:
+        print(f"\n[{name}] {output}")
+
+
+# --- Batch mode ---
+
+def load_batch_queries(input_path: str) -> List[Dict[str, Any]]:
+    """
+    Reads queries from a JSONL file. Each line must be a JSON object with an
+    "input" (or "query"/"question") field and may carry an "id"; lines without
+    an id are keyed by their line number so resumed runs match them up again.
+    """
+    queries = []
+    with open(input_path, mode='r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Skipping line {line_no}: invalid JSON ({e})")
+                continue
+            if not isinstance(record, dict):
+                print(f"Skipping line {line_no}: not a JSON object")
+                continue
+            query = record.get("input") or record.get("query") or record.get("question")
+            if not query:
+                print(f"Skipping line {line_no}: no 'input' field")
+                continue
+            queries.append({"id": str(record.get("id", line_no)), "input": query})
+    return queries
+
+
+def compact_output_file(output_path: str) -> Set[str]:
+    """
+    Prepares an existing output file for resuming and returns the ids that
+    completed successfully. The file is rewritten to keep only the latest
+    successful record per id: failed records (rate limits, a server that was
+    down) are dropped so their queries are retried, and a line cut off by an
+    interrupted run is dropped so the next append does not join onto it.
+    """
+    completed: Dict[str, str] = {}
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, mode='r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                record_id = str(record["id"])
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+            if record.get("error") is None:
+                completed[record_id] = line if line.endswith("\n") else line + "\n"
+
+    temp_path = output_path + ".tmp"
+    with open(temp_path, mode='w', encoding='utf-8') as f:
+        f.writelines(completed.values())
+    os.replace(temp_path, output_path)
+    return set(completed)
+
+
+def format_tool_calls(intermediate_steps) -> List[Dict[str, Any]]:
+    """Converts AgentExecutor intermediate steps into JSON-serialisable tool call records."""
+    return [
+        {"tool": action.tool, "args": action.tool_input, "result": str(observation)}
+        for action, observation in intermediate_steps
+    ]
+
+
+async def run_one_query(agent_executor: "AgentExecutor", query: Dict[str, Any],
+                        semaphore: asyncio.Semaphore, llm=None) -> Dict[str, Any]:
+    """
+    Runs a single query under the concurrency limit and returns its result
+    record. When an llm is given the query is answered in plan mode.
+    """
+    async with semaphore:
+        start = time.perf_counter()
+        result = {"id": query["id"], "input": query["input"]}
+        try:
+            if llm is not None:
+                planned = await answer_with_plan(agent_executor, llm, query["input"])
+                result["output"] = planned["output"]
+                result["tool_calls"] = planned["tool_calls"]
+                result["mode"] = planned["mode"]
+            else:
+                response = await agent_executor.ainvoke({"input": query["input"]})
+                result["output"] = response["output"]
+                result["tool_calls"] = format_tool_calls(response.get("intermediate_steps", []))
+                result["mode"] = "agent"
+            result["error"] = None
+        except Exception as e:
+            result["output"] = None
+            result["tool_calls"] = []
+            result["mode"] = None
+            result["error"] = f"{type(e).__name__}: {e}"
+        result["latency_s"] = round(time.perf_counter() - start, 3)
+        return result
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def print_batch_summary(results: List[Dict[str, Any]], wall_time: float, skipped: int):
+    """Prints throughput and latency statistics for a finished batch run."""
+    errors = sum(1 for r in results if r["error"])
+    print("\n--- Batch summary ---")
+    print(f"Queries run: {len(results)} (skipped as already done: {skipped})")
+    print(f"Succeeded: {len(results) - errors}, failed: {errors}")
+    print(f"Wall time: {wall_time:.2f}s")
+    if not results:
+        return
+    latencies = [r["latency_s"] for r in results]
+    print(f"Throughput: {len(results) / wall_time:.2f} queries/s")
+    print(f"Latency mean: {statistics.mean(latencies):.2f}s, "
+          f"p50: {percentile(latencies, 50):.2f}s, "
+          f"p95: {percentile(latencies, 95):.2f}s, "
+          f"max: {max(latencies):.2f}s")
+    tool_calls = sum(len(r["tool_calls"]) for r in results)
+    print(f"Tool calls: {tool_calls} total, {tool_calls / len(results):.2f} per query")
+
+
+async def run_batch(input_path: str, output_path: str, concurrency: int, mode: str = "agent"):
+    """
+    Runs every query in input_path through one shared agent with at most
+    `concurrency` queries in flight, appending each result to output_path as
+    soon as it finishes. Queries that already succeeded in output_path are
+    skipped and failed ones are retried, so an interrupted run can be resumed
+    by re-running the same command.
+    With mode "plan" each query is answered by answer_with_plan.
+    """
+    queries = load_batch_queries(input_path)
+    completed = compact_output_file(output_path)
+    pending = [q for q in queries if q["id"] not in completed]
+    print(f"Loaded {len(queries)} queries, {len(queries) - len(pending)} already done, "
+          f"{len(pending)} to run with concurrency {concurrency}.")
+    if not pending:
+        return
+
+    agent_executor = await create_agent_with_mcp_tools(verbose=False)
+    llm = create_llm() if mode == "plan" else None
+    semaphore = asyncio.Semaphore(concurrency)
+
+    results = []
+    start = time.perf_counter()
+    with open(output_path, mode='a', encoding='utf-8') as out:
+        tasks = [asyncio.create_task(run_one_query(agent_executor, q, semaphore, llm)) for q in pending]
+        for done_count, task in enumerate(asyncio.as_completed(tasks), start=1):
+            result = await task
+            out.write(json.dumps(result, default=str) + "\n")
+            out.flush()
+            results.append(result)
+            status = "ERROR" if result["error"] else "ok"
+            print(f"[{done_count}/{len(pending)}] {result['id']} {status} in {result['latency_s']:.2f}s")
+    wall_time = time.perf_counter() - start
+
+    print_batch_summary(results, wall_time, skipped=len(queries) - len(pending))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run queries against the MCP tool-calling agent.")
+    parser.add_argument("--batch", metavar="INPUT_JSONL",
+                        help="Run every query in this JSONL file instead of the sample query.")
+    parser.add_argument("--output", default="batch_results.jsonl",
+                        help="JSONL file results are appended to in batch mode (default: batch_results.jsonl).")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Maximum number of queries in flight in batch mode (default: 4).")
+    parser.add_argument("--mode", choices=["agent", "plan", "compare"], default="agent",
+                        help="agent: AgentExecutor tool loop; plan: one-shot tool plan executed by the client; "
+                             "compare: run the sample query both ways and report LLM calls and wall time.")
+    parser.add_argument("--query", default="What is the weather of the city associated with the user with user_id 101?",
+                        help="Query to run when not in batch mode.")
+    parser.add_argument(startup_profile.PROFILE_FLAG, action="store_true",
+                        help="Report import-time and init-phase breakdowns for agent startup, then exit.")
+    args = parser.parse_args()
+    if args.batch and args.mode == "compare":
+        parser.error("--mode compare runs a single query; use --mode agent or --mode plan with --batch")
+    return args
+
+
+async def main(query: str, mode: str = "agent"):
     """Main function to run the agent with a sample query."""
     try:
         agent_executor = await create_agent_with_mcp_tools()
 
         # This is your key test query.
         print("\n--- Testing combination tool calling with MCP servers ---")
-        query = "What is the weather of the city associated with the user with user_id 101?"
 
-        # We assume user 969 exists and has a city
-        response = await agent_executor.ainvoke({"input": query})
+        if mode == "compare":
+            await compare_modes(agent_executor, create_llm(), query)
+            return
+
+        if mode == "plan":
+            output = (await answer_with_plan(agent_executor, create_llm(), query))["output"]
+        else:
+            # We assume user 101 exists and has a city
+            output = (await agent_executor.ainvoke({"input": query}))["output"]
 
         print(f"\nUser Query: {query}")
-        print(f"Agent Answer: {response['output']}")
+        print(f"Agent Answer: {output}")
 
     except Exception as e:
         print(f"An error occurred: {e}")
 
 
+async def profile_startup():
+    """Builds the agent (servers must be running) so its init phases are timed, then reports."""
+    try:
+        await create_agent_with_mcp_tools(verbose=False)
+    except Exception as e:
+        print(f"Agent initialization failed: {e}")
+    startup_profile.report_and_exit("mcp_client_cli")
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    args = parse_args()
+    if args.profile_startup:
+        asyncio.run(profile_startup())
+    elif args.batch:
+        asyncio.run(run_batch(args.batch, args.output, max(1, args.concurrency), args.mode))
+    else:
+        asyncio.run(main(args.query, args.mode))
\ No newline at end of file
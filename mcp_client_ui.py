@@ -1,20 +1,19 @@
-import os
+from utils import startup_profile
+
+startup_profile.start()
+
 import asyncio
-import gradio as gr
 import json
-import pandas as pd
 from dotenv import load_dotenv
 from typing import List, AsyncGenerator
 
-from langchain.chat_models import init_chat_model
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langchain_mcp_adapters.tools import load_mcp_tools
-from langchain.agents import AgentExecutor, create_tool_calling_agent
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.tools import BaseTool
+# gradio, pandas and the LangChain stack are imported where they are first
+# needed: gradio when the interface is built, LangChain on the first message,
+# pandas only when a JSON answer is rendered as a table.
 
 # --- Configuration & Initialization ---
-load_dotenv()
+with startup_profile.phase("load .env"):
+    load_dotenv()
 
 mcp_servers_config = {
     "MathService": {
@@ -45,14 +44,22 @@ async def initialize_agent():
     if AGENT_EXECUTOR:
         return AGENT_EXECUTOR
 
+    with startup_profile.phase("import LangChain stack"):
+        from langchain.chat_models import init_chat_model
+        from langchain_mcp_adapters.client import MultiServerMCPClient
+        from langchain.agents import AgentExecutor, create_tool_calling_agent
+        from langchain_core.prompts import ChatPromptTemplate
+
     print("Initializing MultiServerMCPClient...")
     client = MultiServerMCPClient(mcp_servers_config)
 
     print("Loading tools from all connected MCP servers...")
-    tools: List[BaseTool] = await client.get_tools()
+    with startup_profile.phase("load MCP tools"):
+        tools = await client.get_tools()
     print(f"Successfully loaded {len(tools)} tools: {[tool.name for tool in tools]}")
 
-    llm = init_chat_model("gemini-2.0-flash", model_provider="google_genai", temperature=0)
+    with startup_profile.phase("initialize LLM"):
+        llm = init_chat_model("gemini-2.0-flash", model_provider="google_genai", temperature=0)
 
     prompt = ChatPromptTemplate.from_messages(
         [
@@ -73,8 +80,9 @@ async def initialize_agent():
         ]
     )
 
-    agent = create_tool_calling_agent(llm, tools, prompt)
-    AGENT_EXECUTOR = AgentExecutor(agent=agent, tools=tools, verbose=True)
+    with startup_profile.phase("build agent"):
+        agent = create_tool_calling_agent(llm, tools, prompt)
+        AGENT_EXECUTOR = AgentExecutor(agent=agent, tools=tools, verbose=True)
 
     return AGENT_EXECUTOR
 
@@ -92,6 +100,8 @@ def is_json_string(s: str) -> bool:
 
 def format_json_as_table(json_data: str) -> str:
     """Converts a JSON string to a Markdown table."""
+    import pandas as pd
+
     try:
         data = json.loads(json_data)
 
@@ -150,24 +160,40 @@ async def respond(message: str, history: List[List[str]]) -> AsyncGenerator[str,
     yield final_output
 
 
+async def profile_startup():
+    """Builds the agent (servers must be running) so its init phases are timed, then reports."""
+    try:
+        await initialize_agent()
+    except Exception as e:
+        print(f"Agent initialization failed: {e}")
+    startup_profile.report_and_exit("mcp_client_ui")
+
+
 if __name__ == "__main__":
-    demo = gr.ChatInterface(
-        fn=respond,
-        title="MCP-Powered Conversational Agent",
-        description="Ask me questions about arithmetic, user data, Northwind database, or the weather!",
-        # examples=[
-        #     ["What is the weather of the city associated with the user with user_id 101?"],
-        #     ["List all users."],
-        #     ["What are the details of user with user_id 969?"],
-        #     ["What is 100 divided by 5?"],
-        #     ["What is the weather in London?"],
-        #     [
-        #         "Add a new user named Bob Smith with ID 300, born 1995-10-20, living at 123 Pine St, Anytown, IL 60601, phone 555-111-2222, email bob@example.com."]
-        # ],
-        chatbot=gr.Chatbot(height=500),
-        theme="soft",
-        type="messages",
-    )
+    with startup_profile.phase("import gradio"):
+        import gradio as gr
+
+    with startup_profile.phase("build Gradio interface"):
+        demo = gr.ChatInterface(
+            fn=respond,
+            title="MCP-Powered Conversational Agent",
+            description="Ask me questions about arithmetic, user data, Northwind database, or the weather!",
+            # examples=[
+            #     ["What is the weather of the city associated with the user with user_id 101?"],
+            #     ["List all users."],
+            #     ["What are the details of user with user_id 969?"],
+            #     ["What is 100 divided by 5?"],
+            #     ["What is the weather in London?"],
+            #     [
+            #         "Add a new user named Bob Smith with ID 300, born 1995-10-20, living at 123 Pine St, Anytown, IL 60601, phone 555-111-2222, email bob@example.com."]
+            # ],
+            chatbot=gr.Chatbot(height=500),
+            theme="soft",
+            type="messages",
+        )
+
+    if startup_profile.enabled():
+        asyncio.run(profile_startup())
 
     print("Launching Gradio interface. Please open http://127.0.0.1:7860 in your browser.")
     demo.launch(share=False)
\ No newline at end of file
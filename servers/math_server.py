@@ -1,3 +1,13 @@
+import os
+import sys
+
+# Allow `python servers/<name>.py` to import the shared utils package.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils import startup_profile
+
+startup_profile.start()
+
 import logging
 from mcp.server.fastmcp import FastMCP
 
@@ -57,5 +67,6 @@ def divide(a: float, b: float) -> float:
 
 
 if __name__ == "__main__":
+    startup_profile.report_and_exit("MathService")
     logger.info("Starting MathService server with tools: add, subtract, multiply, divide")
     mcp.run(transport="streamable-http")
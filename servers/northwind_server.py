@@ -1,7 +1,19 @@
+import os
+import sys
+
+# Allow `python servers/<name>.py` to import the shared utils package.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils import startup_profile
+
+startup_profile.start()
+
 from mcp.server.fastmcp import FastMCP
-import psycopg2
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+import asyncio
 import logging
+import re
+import time
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -16,39 +28,308 @@ DB_PARAMS = {
     "password": "suraj7177"  # Update with your actual password
 }
 
+# Admission control. Only single statements are accepted, and every statement
+# EXPLAIN supports is EXPLAINed (without ANALYZE, so nothing runs) before execution.
+# Reads estimated to return more than MAX_ESTIMATED_ROWS rows get a LIMIT appended
+# and a truncation marker row (or are rejected when OVERSIZED_QUERY_ACTION is
+# "reject"); queries whose estimated cost is still above MAX_ESTIMATED_COST are rejected.
+MAX_ESTIMATED_COST = float(os.getenv("NORTHWIND_MAX_ESTIMATED_COST", "1000000"))
+MAX_ESTIMATED_ROWS = int(os.getenv("NORTHWIND_MAX_ESTIMATED_ROWS", "1000"))
+OVERSIZED_QUERY_ACTION = os.getenv("NORTHWIND_OVERSIZED_QUERY_ACTION", "limit")
+
+# At most MAX_CONCURRENT_QUERIES queries hit Postgres at once; the rest wait in
+# line for up to QUEUE_TIMEOUT_SECONDS before being turned away.
+MAX_CONCURRENT_QUERIES = int(os.getenv("NORTHWIND_MAX_CONCURRENT_QUERIES", "4"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("NORTHWIND_QUEUE_TIMEOUT_SECONDS", "30"))
+# Server-side cap on any single statement, including ones EXPLAIN cannot estimate.
+STATEMENT_TIMEOUT_MS = int(os.getenv("NORTHWIND_STATEMENT_TIMEOUT_MS", "30000"))
+
+QUERY_SEMAPHORE = asyncio.Semaphore(MAX_CONCURRENT_QUERIES)
+# Only updated from the event loop; exposed through the query_metrics tool.
+QUERY_METRICS = {
+    "admitted": 0,
+    "queue_timeouts": 0,
+    "rejected": 0,
+    "auto_limited": 0,
+    "cancelled": 0,
+    "waiting": 0,
+    "in_flight": 0,
+    "total_queue_seconds": 0.0,
+    "max_queue_seconds": 0.0,
+}
+
 mcp = FastMCP("NorthWindService", transport_mode="streamable-http", port=8060)
 
 
-@mcp.tool()
-def run_query(query: str) -> List[Dict[str, Any]]:
-    """Execute a SQL query on the Northwind PostgreSQL database and return the results."""
-    logger.info(f"Executing query: {query}")
+# Statements EXPLAIN accepts; anything else (DDL, SET, SHOW, ...) skips the estimate
+# and is bounded only by STATEMENT_TIMEOUT_MS.
+EXPLAINABLE_STATEMENTS = {"select", "with", "values", "insert", "update", "delete", "merge", "table"}
+# Statements that only read, so they can be wrapped in a LIMIT subquery.
+READ_STATEMENTS = {"select", "with", "values", "table"}
+# Keywords that make a SELECT or WITH query write data, so it must not be wrapped in a LIMIT subquery.
+WRITE_KEYWORDS = {"insert", "update", "delete", "merge", "into"}
+
+_DOLLAR_QUOTE = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)?\$")
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*")
+
+
+class QueryRejected(Exception):
+    """Raised when admission control refuses a query; the message tells the agent how to fix it."""
+
+
+def _split_statements(query: str) -> List[Tuple[str, List[str]]]:
+    """
+    Splits SQL on top-level semicolons, skipping string literals, quoted
+    identifiers, dollar-quoted bodies and comments. Returns each non-empty
+    statement with its lower-cased bare keywords/identifiers in order.
+    """
+    statements = []
+    start = i = 0
+    words: List[str] = []
+    n = len(query)
+    while i < n:
+        ch = query[i]
+        if ch == "'" or ch == '"':
+            # E'...' strings allow backslash escapes; doubled quotes escape in all of them.
+            escapes = ch == "'" and i > 0 and query[i - 1] in "eE" and (i < 2 or not query[i - 2].isalnum())
+            i += 1
+            while i < n:
+                if escapes and query[i] == "\\":
+                    i += 2
+                    continue
+                if query[i] == ch:
+                    if i + 1 < n and query[i + 1] == ch:
+                        i += 2
+                        continue
+                    break
+                i += 1
+            i += 1
+        elif query.startswith("--", i):
+            end = query.find("\n", i)
+            i = n if end == -1 else end + 1
+        elif query.startswith("/*", i):
+            end = query.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+        elif ch == "$" and _DOLLAR_QUOTE.match(query, i):
+            tag = _DOLLAR_QUOTE.match(query, i).group(0)
+            end = query.find(tag, i + len(tag))
+            i = n if end == -1 else end + len(tag)
+        elif ch == ";":
+            if words:
+                statements.append((query[start:i].strip(), words))
+            start, words = i + 1, []
+            i += 1
+        elif ch.isalpha() or ch == "_":
+            word = _WORD.match(query, i).group(0)
+            words.append(word.lower())
+            i += len(word)
+        else:
+            i += 1
+    if words:
+        statements.append((query[start:].strip(), words))
+    return statements
+
+
+def _single_statement(query: str) -> Tuple[str, List[str]]:
+    """Returns the only statement in `query`, rejecting empty input and multi-statement batches."""
+    statements = _split_statements(query)
+    if not statements:
+        raise QueryRejected("Query rejected: no SQL statement was given.")
+    if len(statements) > 1:
+        raise QueryRejected(
+            f"Query rejected: it contains {len(statements)} SQL statements. "
+            "run_query accepts one statement per call; send each statement separately."
+        )
+    return statements[0]
+
+
+def _estimate(cursor, query: str) -> Tuple[float, float]:
+    """Returns the planner's (total cost, row estimate) for a query without executing it."""
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {query}")
+    plan = cursor.fetchone()[0][0]["Plan"]
+    return plan["Total Cost"], plan["Plan Rows"]
+
+
+def _admit(cursor, query: str, words: List[str]) -> Tuple[str, bool]:
+    """
+    Checks a query's EXPLAIN estimates against the configured limits and
+    returns the query to run plus whether a LIMIT was added to it. The added
+    LIMIT is one above MAX_ESTIMATED_ROWS so _execute can tell whether rows
+    were actually cut off.
+    """
+    if words[0] == "explain" and {"analyze", "analyse"}.intersection(words):
+        raise QueryRejected(
+            "Query rejected: EXPLAIN ANALYZE executes the query. Use plain EXPLAIN to see the plan, "
+            "or run the query itself so its cost can be checked."
+        )
+    if words[0] not in EXPLAINABLE_STATEMENTS:
+        # EXPLAIN cannot estimate DDL or utility statements; they run under the statement timeout.
+        return query, False
+
+    cost, rows = _estimate(cursor, query)
+    is_read = words[0] in READ_STATEMENTS and not WRITE_KEYWORDS.intersection(words)
+    limited = False
+
+    if rows > MAX_ESTIMATED_ROWS and is_read:
+        if OVERSIZED_QUERY_ACTION != "limit":
+            raise QueryRejected(
+                f"Query rejected: the planner estimates {rows:.0f} rows, above the limit of "
+                f"{MAX_ESTIMATED_ROWS}. Add WHERE filters, aggregate with GROUP BY, or add "
+                f"LIMIT {MAX_ESTIMATED_ROWS} or less."
+            )
+        # Newlines keep a trailing "--" comment in the query from swallowing the wrapper.
+        query = f"SELECT * FROM (\n{query}\n) AS limited_query LIMIT {MAX_ESTIMATED_ROWS + 1}"
+        cost, rows = _estimate(cursor, query)
+        limited = True
+        logger.info(f"Query auto-limited to {MAX_ESTIMATED_ROWS} rows")
+
+    if cost > MAX_ESTIMATED_COST:
+        raise QueryRejected(
+            f"Query rejected: the planner estimates a cost of {cost:.0f}, above the limit of "
+            f"{MAX_ESTIMATED_COST:.0f}. This usually means a missing join condition (cross join) "
+            f"or a scan over large tables; add join conditions, WHERE filters, or a LIMIT and try again."
+        )
+    return query, limited
+
+
+def _execute(query: str, words: List[str], connection_ref: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Runs admission checks and then the query itself on a fresh connection.
+    Returns the rows and whether an automatic LIMIT was applied. The
+    connection is stored in connection_ref so run_query can cancel it.
+    """
+    # Imported on first use so the server starts without loading the driver.
+    import psycopg2
+
+    conn = psycopg2.connect(**DB_PARAMS, options=f"-c statement_timeout={STATEMENT_TIMEOUT_MS}")
+    connection_ref["conn"] = conn
     try:
-        # Connect to the database
-        conn = psycopg2.connect(**DB_PARAMS)
         cursor = conn.cursor()
+        query, limited = _admit(cursor, query, words)
 
         # Execute the query
         cursor.execute(query)
 
-        # Fetch results if it's a SELECT query
-        if query.strip().lower().startswith("select"):
+        # Fetch results if the statement returned rows (SELECT, ... RETURNING)
+        if cursor.description is not None:
             columns = [desc[0] for desc in cursor.description]
             results = [dict(zip(columns, row)) for row in cursor.fetchall()]
         else:
             # For non-SELECT queries, return affected row count
             results = [{"affected_rows": cursor.rowcount}]
-            conn.commit()
+        # Writes with RETURNING also produce rows, so every statement is committed.
+        conn.commit()
+
+        if limited and len(results) > MAX_ESTIMATED_ROWS:
+            results = results[:MAX_ESTIMATED_ROWS]
+            results.append({
+                "_truncated": True,
+                "hint": (
+                    f"Only the first {MAX_ESTIMATED_ROWS} rows are shown; the full result is larger. "
+                    "Do not count or total these rows. Use COUNT(*)/SUM()/GROUP BY for aggregates, "
+                    "or add WHERE filters to narrow the result."
+                ),
+            })
 
         cursor.close()
+        return results, limited
+    finally:
         conn.close()
-        logger.info(f"Query successful, results: {results}")
-        return results
+
+
+def _release_slot(work: "asyncio.Future"):
+    """Frees a query slot once the worker thread has really finished, even if run_query was cancelled."""
+    if not work.cancelled():
+        # Marks the exception as retrieved when nobody awaited the result.
+        work.exception()
+    QUERY_METRICS["in_flight"] -= 1
+    QUERY_SEMAPHORE.release()
+
+
+@mcp.tool()
+async def run_query(query: str) -> List[Dict[str, Any]]:
+    """Execute a SQL query on the Northwind PostgreSQL database and return the results.
+    Only one statement is accepted per call. Queries the planner estimates to be too
+    expensive are rejected with an explanation, and very large result sets are truncated
+    with a LIMIT, in which case the last row is {"_truncated": true, "hint": ...}.
+    """
+    logger.info(f"Executing query: {query}")
+    try:
+        query, words = _single_statement(query)
+    except QueryRejected as e:
+        QUERY_METRICS["rejected"] += 1
+        logger.warning(str(e))
+        raise Exception(str(e))
+
+    queued_at = time.perf_counter()
+    QUERY_METRICS["waiting"] += 1
+    try:
+        await asyncio.wait_for(QUERY_SEMAPHORE.acquire(), timeout=QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        QUERY_METRICS["queue_timeouts"] += 1
+        logger.warning(f"Query turned away after waiting {QUEUE_TIMEOUT_SECONDS}s in the queue")
+        raise Exception(
+            f"Database busy: the query waited more than {QUEUE_TIMEOUT_SECONDS}s for a free slot. "
+            "Try again shortly."
+        )
+    finally:
+        QUERY_METRICS["waiting"] -= 1
+
+    queue_seconds = time.perf_counter() - queued_at
+    QUERY_METRICS["admitted"] += 1
+    QUERY_METRICS["in_flight"] += 1
+    QUERY_METRICS["total_queue_seconds"] += queue_seconds
+    QUERY_METRICS["max_queue_seconds"] = max(QUERY_METRICS["max_queue_seconds"], queue_seconds)
+    logger.info(
+        f"Query admitted after {queue_seconds:.3f}s in queue "
+        f"(in flight: {QUERY_METRICS['in_flight']}/{MAX_CONCURRENT_QUERIES}, waiting: {QUERY_METRICS['waiting']}, "
+        f"mean queue time: {QUERY_METRICS['total_queue_seconds'] / QUERY_METRICS['admitted']:.3f}s, "
+        f"max: {QUERY_METRICS['max_queue_seconds']:.3f}s)"
+    )
+
+    # psycopg2 blocks, so the query runs in a worker thread to keep the server responsive.
+    # A cancelled call cannot stop that thread, so the slot is released by the thread's
+    # completion rather than here, and the backend query is cancelled to end it quickly.
+    connection_ref: Dict[str, Any] = {}
+    work = asyncio.ensure_future(asyncio.to_thread(_execute, query, words, connection_ref))
+    work.add_done_callback(_release_slot)
+    try:
+        results, limited = await asyncio.shield(work)
+    except asyncio.CancelledError:
+        QUERY_METRICS["cancelled"] += 1
+        conn = connection_ref.get("conn")
+        if conn is not None:
+            try:
+                conn.cancel()
+            except Exception as e:
+                logger.warning(f"Could not cancel backend query: {e}")
+        raise
+    except QueryRejected as e:
+        QUERY_METRICS["rejected"] += 1
+        logger.warning(str(e))
+        raise Exception(str(e))
     except Exception as e:
         logger.error(f"Query failed: {str(e)}")
         raise Exception(f"Database error: {str(e)}")
 
+    if limited:
+        QUERY_METRICS["auto_limited"] += 1
+    logger.info(f"Query successful, results: {results}")
+    return results
+
+
+@mcp.tool()
+def query_metrics() -> Dict[str, Any]:
+    """Return run_query admission-control counters and queue-time statistics."""
+    snapshot = dict(QUERY_METRICS)
+    snapshot["max_concurrent_queries"] = MAX_CONCURRENT_QUERIES
+    snapshot["mean_queue_seconds"] = (
+        QUERY_METRICS["total_queue_seconds"] / QUERY_METRICS["admitted"] if QUERY_METRICS["admitted"] else 0.0
+    )
+    return snapshot
+
 
 if __name__ == "__main__":
-    logger.info("Starting NorthwindService MCP server with tools: run_query")
+    startup_profile.report_and_exit("NorthwindService")
+    logger.info("Starting NorthwindService MCP server with tools: run_query, query_metrics")
     mcp.run(transport="streamable-http")
@@ -1,7 +1,16 @@
+import os  # For managing sensitive information like API keys
+import sys
+
+# Allow `python servers/<name>.py` to import the shared utils package.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils import startup_profile
+
+startup_profile.start()
+
 from mcp.server.fastmcp import FastMCP
 import requests
 import logging
-import os  # For managing sensitive information like API keys
 
 mcp = FastMCP("UserAPIService", transport_mode="streamable-http", port=8080)
 
@@ -148,6 +157,7 @@ def remove_user(user_id: int):
 
 
 if __name__ == "__main__":
+    startup_profile.report_and_exit("UserAPIService")
     # IMPORTANT: Replace "[PLACEHOLDER_YOUR_API_BASE_URL]" above with your actual FastAPI base URL.
     # For example: BASE_URL = "http://127.0.0.1:8000" if running locally.
     # Choose your transport type: "stdio" for standard input/output, or "streamable-http" for HTTP.
@@ -1,5 +1,14 @@
-import json
 import os
+import sys
+
+# Allow `python servers/<name>.py` to import the shared utils package.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils import startup_profile
+
+startup_profile.start()
+
+import json
 import logging
 from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
@@ -54,5 +63,6 @@ def get_weather(location: str, unit: Optional[str] = "metric"):
 
 
 if __name__ == "__main__":
+    startup_profile.report_and_exit("WeatherService")
     logger.info("Starting WeatherService MCP server with tools: get_weather")
     mcp.run(transport="streamable-http")
@@ -0,0 +1,220 @@
+import asyncio
+import threading
+
+import pytest
+
+from servers import northwind_server
+from servers.northwind_server import QueryRejected, _split_statements, _single_statement, _admit
+
+
+class FakeCursor:
+    """Answers EXPLAIN with canned estimates and records every statement it is given."""
+
+    def __init__(self, cost=10.0, rows=10, limited_cost=None):
+        self.cost = cost
+        self.rows = rows
+        self.limited_cost = cost if limited_cost is None else limited_cost
+        self.executed = []
+
+    def execute(self, sql):
+        self.executed.append(sql)
+        limited = "limited_query" in sql
+        self._plan = [[{"Plan": {
+            "Total Cost": self.limited_cost if limited else self.cost,
+            "Plan Rows": northwind_server.MAX_ESTIMATED_ROWS + 1 if limited else self.rows,
+        }}]]
+
+    def fetchone(self):
+        return self._plan
+
+
+def statements(query):
+    return [text for text, _ in _split_statements(query)]
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT ';' AS a",
+    "SELECT $$a;b$$",
+    "SELECT $tag$ ; $tag$",
+    "SELECT E'\\';' AS a",
+    "SELECT 'it''s;' AS a",
+    'SELECT 1 AS "we;ird"',
+    "SELECT 1 -- trailing; comment",
+    "SELECT 1 /* ; */",
+    "SELECT 1;",
+    "SELECT 1;  -- nothing after",
+])
+def test_semicolons_inside_literals_and_comments_do_not_split(query):
+    assert len(statements(query)) == 1
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT 1; UPDATE t SET x = x + 1",
+    "SELECT 'a'; DROP TABLE t",
+    "SELECT E'\\'' ; DELETE FROM t",
+    "SELECT $$x$$; DELETE FROM t",
+    "SELECT 1 /* a */; /* b */ SELECT 2",
+])
+def test_multiple_statements_are_rejected(query):
+    with pytest.raises(QueryRejected, match="statements"):
+        _single_statement(query)
+
+
+def test_empty_input_is_rejected():
+    with pytest.raises(QueryRejected):
+        _single_statement("  ; -- only a comment")
+
+
+def test_words_skip_literals_and_quoted_identifiers():
+    _, words = _single_statement("SELECT \"delete\", 'update' FROM orders")
+    assert words == ["select", "from", "orders"]
+
+
+@pytest.mark.parametrize("query", [
+    "EXPLAIN ANALYZE SELECT * FROM a CROSS JOIN b",
+    "EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM a CROSS JOIN b",
+    "explain analyse select 1",
+])
+def test_explain_analyze_is_rejected_without_running_anything(query):
+    cursor = FakeCursor()
+    query, words = _single_statement(query)
+    with pytest.raises(QueryRejected, match="EXPLAIN ANALYZE"):
+        _admit(cursor, query, words)
+    assert cursor.executed == []
+
+
+def test_plain_explain_and_ddl_skip_the_estimate():
+    for sql in ("EXPLAIN SELECT * FROM a CROSS JOIN b", "CREATE TABLE t (a int)", "SHOW search_path"):
+        cursor = FakeCursor()
+        assert _admit(cursor, *_single_statement(sql)) == (sql, False)
+        assert cursor.executed == []
+
+
+def test_small_reads_run_unchanged():
+    cursor = FakeCursor(rows=5)
+    assert _admit(cursor, *_single_statement("SELECT * FROM orders")) == ("SELECT * FROM orders", False)
+
+
+@pytest.mark.parametrize("sql", ["SELECT * FROM orders", "TABLE orders", "WITH o AS (SELECT 1) SELECT * FROM o"])
+def test_large_reads_are_wrapped_in_a_limit(sql):
+    cursor = FakeCursor(rows=10 ** 6)
+    query, limited = _admit(cursor, *_single_statement(sql))
+    assert limited
+    assert query.startswith("SELECT * FROM (\n" + sql + "\n) AS limited_query LIMIT ")
+
+
+@pytest.mark.parametrize("sql", [
+    "WITH d AS (DELETE FROM orders RETURNING *) SELECT * FROM d",
+    "UPDATE orders SET freight = 0",
+    "SELECT * INTO backup FROM orders",
+])
+def test_writes_are_never_wrapped(sql):
+    cursor = FakeCursor(rows=10 ** 6)
+    assert _admit(cursor, *_single_statement(sql)) == (sql, False)
+
+
+def test_expensive_queries_are_rejected_even_after_limiting():
+    cursor = FakeCursor(cost=1e12, rows=10 ** 9)
+    with pytest.raises(QueryRejected, match="cost"):
+        _admit(cursor, *_single_statement("SELECT * FROM a CROSS JOIN b"))
+
+
+def test_cancelled_call_keeps_its_slot_until_the_worker_thread_finishes(monkeypatch):
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_execute(query, words, connection_ref):
+        started.set()
+        finish.wait(5)
+        return [], False
+
+    monkeypatch.setattr(northwind_server, "_execute", slow_execute)
+    monkeypatch.setattr(northwind_server, "QUERY_SEMAPHORE", asyncio.Semaphore(1))
+    monkeypatch.setattr(northwind_server, "QUERY_METRICS", dict(northwind_server.QUERY_METRICS, in_flight=0))
+
+    async def scenario():
+        call = asyncio.ensure_future(northwind_server.run_query("SELECT 1"))
+        await asyncio.to_thread(started.wait, 5)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        # The query is still running in its thread, so the slot must still be held.
+        assert northwind_server.QUERY_METRICS["in_flight"] == 1
+        assert northwind_server.QUERY_SEMAPHORE.locked()
+
+        finish.set()
+        for _ in range(100):
+            if not northwind_server.QUERY_SEMAPHORE.locked():
+                break
+            await asyncio.sleep(0.01)
+        assert northwind_server.QUERY_METRICS["in_flight"] == 0
+        assert northwind_server.QUERY_METRICS["cancelled"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_query_metrics_reports_mean_queue_time(monkeypatch):
+    monkeypatch.setattr(northwind_server, "QUERY_METRICS",
+                        dict(northwind_server.QUERY_METRICS, admitted=4, total_queue_seconds=2.0))
+    snapshot = northwind_server.query_metrics()
+    assert snapshot["mean_queue_seconds"] == 0.5
+    assert snapshot["max_concurrent_queries"] == northwind_server.MAX_CONCURRENT_QUERIES
+
+
+
+class FakeDbCursor(FakeCursor):
+    """A FakeCursor that also returns `rows` from the final statement, honouring its LIMIT."""
+
+    def __init__(self, rows, columns):
+        super().__init__(rows=len(rows))
+        self.result_rows = rows
+        self.columns = columns
+        self.description = None
+
+    def execute(self, sql):
+        super().execute(sql)
+        self.description = None if sql.startswith("EXPLAIN") else [(column,) for column in self.columns]
+
+    def fetchall(self):
+        return self.result_rows[:northwind_server.MAX_ESTIMATED_ROWS + 1]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, rows, columns=("n",)):
+        self.db_cursor = FakeDbCursor(rows, columns)
+        self.committed = self.closed = False
+
+    def cursor(self):
+        return self.db_cursor
+
+    def commit(self):
+        self.committed = True
+
+    def close(self):
+        self.closed = True
+
+def test_execute_marks_truncated_results_and_commits(monkeypatch):
+    import psycopg2
+
+    connection = FakeConnection([(i,) for i in range(northwind_server.MAX_ESTIMATED_ROWS * 3)])
+    monkeypatch.setattr(psycopg2, "connect", lambda **kwargs: connection)
+
+    results, limited = northwind_server._execute(*_single_statement("SELECT n FROM big"), {})
+    assert limited
+    assert len(results) == northwind_server.MAX_ESTIMATED_ROWS + 1
+    assert results[-1]["_truncated"] is True
+    assert connection.committed and connection.closed
+
+
+def test_execute_commits_writes_that_return_rows(monkeypatch):
+    import psycopg2
+
+    connection = FakeConnection([(1,)], columns=("order_id",))
+    monkeypatch.setattr(psycopg2, "connect", lambda **kwargs: connection)
+
+    results, limited = northwind_server._execute(
+        *_single_statement("INSERT INTO orders DEFAULT VALUES RETURNING order_id"), {})
+    assert results == [{"order_id": 1}] and not limited
+    assert connection.committed
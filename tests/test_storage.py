@@ -0,0 +1,78 @@
+import pytest
+from fastapi import HTTPException
+
+import api.users
+from api.storage import USER_FIELDS, UserStore, CsvUserStore, SqliteUserStore
+
+
+def make_user(user_id, **fields):
+    user = {field: f"{field}-{user_id}" for field in USER_FIELDS}
+    user["user_id"] = str(user_id)
+    user.update(fields)
+    return user
+
+
+@pytest.fixture(params=["csv", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "csv":
+        return CsvUserStore(str(tmp_path / "users.csv"))
+    return SqliteUserStore(str(tmp_path / "users.db"), seed_csv_path=None)
+
+
+def test_incomplete_backend_fails_at_construction():
+    class PartialStore(UserStore):
+        def list_users(self):
+            return []
+
+    with pytest.raises(TypeError):
+        PartialStore()
+
+
+def test_backends_return_string_values_in_insertion_order(store):
+    for user_id in (30, 10, 20):
+        assert store.add_user(make_user(user_id))
+
+    assert [user["user_id"] for user in store.list_users()] == ["30", "10", "20"]
+    assert store.get_user(10) == make_user(10)
+
+
+def test_update_keeps_position_and_delete_removes(store):
+    for user_id in (3, 1, 2):
+        store.add_user(make_user(user_id))
+
+    assert store.update_user(make_user(1, city="Paris"))
+    assert store.delete_user(2)
+    assert not store.delete_user(2)
+    assert not store.update_user(make_user(99))
+    assert [(user["user_id"], user["city"]) for user in store.list_users()] == [("3", "city-3"), ("1", "Paris")]
+
+
+def test_duplicate_add_is_refused(store):
+    assert store.add_user(make_user(5))
+    assert not store.add_user(make_user(5))
+
+
+def test_sqlite_csv_round_trip_keeps_order(tmp_path):
+    source = CsvUserStore(str(tmp_path / "in.csv"))
+    for user_id in (7, 2, 9):
+        source.add_user(make_user(user_id))
+
+    sqlite_store = SqliteUserStore(str(tmp_path / "users.db"), seed_csv_path=source.file_path)
+    assert sqlite_store.list_users() == source.list_users()
+
+    sqlite_store.export_csv(str(tmp_path / "out.csv"))
+    assert CsvUserStore(str(tmp_path / "out.csv")).list_users() == source.list_users()
+
+
+def test_api_rejects_unknown_fields_and_returns_stored_row(store, monkeypatch):
+    monkeypatch.setattr(api.users, "store", store)
+
+    with pytest.raises(HTTPException) as error:
+        api.users.add_user(make_user(1, nickname="Bob"))
+    assert error.value.status_code == 400
+    assert store.get_user(1) is None
+
+    assert api.users.add_user(make_user(1)) == make_user(1)
+    with pytest.raises(HTTPException) as error:
+        api.users.update_user(make_user(1, nickname="Bob"))
+    assert error.value.status_code == 400
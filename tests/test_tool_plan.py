@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+import pytest
+
+from utils.tool_plan import PlanError, parse_plan, validate_plan, execute_plan, resolve_arguments
+
+
+class FakeTool:
+    """Stands in for a LangChain tool: records calls and returns a canned or computed result."""
+
+    def __init__(self, result, delay=0.0):
+        self.result = result
+        self.delay = delay
+        self.calls = []
+
+    async def ainvoke(self, args):
+        self.calls.append(args)
+        await asyncio.sleep(self.delay)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result(args) if callable(self.result) else self.result
+
+
+def test_parse_plan_accepts_fenced_json():
+    text = '```json\n{"steps": [{"id": "u", "tool": "get_one_user", "args": {"user_id": 101}}]}\n```'
+    assert parse_plan(text) == [{"id": "u", "tool": "get_one_user", "args": {"user_id": 101}}]
+
+
+def test_parse_plan_accepts_bare_list_and_defaults_args():
+    assert parse_plan('[{"id": "a", "tool": "add"}]') == [{"id": "a", "tool": "add", "args": {}}]
+
+
+def test_parse_plan_accepts_empty_plan():
+    assert parse_plan('{"steps": []}') == []
+
+
+@pytest.mark.parametrize("content", [
+    "not json",
+    '{"steps": {"id": "a"}}',
+    '[{"tool": "add"}]',
+    '[{"id": ["a"], "tool": "add"}]',
+    '[{"id": "a", "tool": "add", "args": [1, 2]}]',
+    ["list", "content"],
+])
+def test_parse_plan_rejects_malformed_plans(content):
+    with pytest.raises(PlanError):
+        parse_plan(content)
+
+
+def test_validate_plan_returns_dependencies():
+    steps = parse_plan('[{"id": "u", "tool": "get_one_user", "args": {"user_id": 1}},'
+                       ' {"id": "w", "tool": "get_weather", "args": {"location": "$u.city"}}]')
+    assert validate_plan(steps, {"get_one_user", "get_weather"}) == {"u": set(), "w": {"u"}}
+
+
+def test_validate_plan_rejects_cycles():
+    steps = parse_plan('[{"id": "a", "tool": "add", "args": {"a": "$b"}},'
+                       ' {"id": "b", "tool": "add", "args": {"a": "$a"}}]')
+    with pytest.raises(PlanError, match="cycle"):
+        validate_plan(steps, {"add"})
+
+
+def test_validate_plan_rejects_unknown_references_and_tools():
+    with pytest.raises(PlanError, match="unknown steps"):
+        validate_plan(parse_plan('[{"id": "a", "tool": "add", "args": {"a": "$missing.x"}}]'), {"add"})
+    with pytest.raises(PlanError, match="unknown tool"):
+        validate_plan(parse_plan('[{"id": "a", "tool": "nope"}]'), {"add"})
+
+
+def test_validate_plan_rejects_duplicate_ids():
+    with pytest.raises(PlanError, match="unique"):
+        validate_plan(parse_plan('[{"id": "a", "tool": "add"}, {"id": "a", "tool": "add"}]'), {"add"})
+
+
+def test_resolve_arguments_follows_nested_paths_in_json_text():
+    results = {"u": json.dumps({"user": {"cities": ["Paris", "Rome"]}})}
+    assert resolve_arguments({"location": "$u.user.cities.1", "unit": "metric"}, results) == \
+        {"location": "Rome", "unit": "metric"}
+
+
+def test_execute_plan_passes_referenced_fields_and_runs_branches_in_parallel():
+    tools = {
+        "get_one_user": FakeTool(lambda args: json.dumps({"user_id": args["user_id"], "city": "Paris"}), delay=0.1),
+        "get_weather": FakeTool(lambda args: f"sunny in {args['location']}", delay=0.1),
+    }
+    steps = parse_plan('[{"id": "u1", "tool": "get_one_user", "args": {"user_id": 1}},'
+                       ' {"id": "u2", "tool": "get_one_user", "args": {"user_id": 2}},'
+                       ' {"id": "w", "tool": "get_weather", "args": {"location": "$u1.city"}}]')
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        records = await execute_plan(steps, tools)
+        return records, loop.time() - start
+
+    records, elapsed = asyncio.run(run())
+    assert records["w"]["args"] == {"location": "Paris"}
+    assert records["w"]["result"] == "sunny in Paris"
+    assert all(record["error"] is None for record in records.values())
+    # Two dependency levels of 0.1s each; running all three steps one after another would take 0.3s.
+    assert elapsed < 0.28
+
+
+def test_execute_plan_skips_steps_whose_dependencies_failed():
+    weather = FakeTool("sunny")
+    tools = {"get_one_user": FakeTool(RuntimeError("server down")), "get_weather": weather}
+    steps = parse_plan('[{"id": "u", "tool": "get_one_user", "args": {"user_id": 1}},'
+                       ' {"id": "w", "tool": "get_weather", "args": {"location": "$u.city"}}]')
+
+    records = asyncio.run(execute_plan(steps, tools))
+    assert records["u"]["error"] == "RuntimeError: server down"
+    assert "Skipped" in records["w"]["error"]
+    assert weather.calls == []
+
+
+def test_execute_plan_reports_unresolvable_reference_as_step_error():
+    tools = {"get_one_user": FakeTool('{"city": "Paris"}'), "get_weather": FakeTool("sunny")}
+    steps = parse_plan('[{"id": "u", "tool": "get_one_user"},'
+                       ' {"id": "w", "tool": "get_weather", "args": {"location": "$u.country"}}]')
+
+    records = asyncio.run(execute_plan(steps, tools))
+    assert "no field 'country'" in records["w"]["error"]
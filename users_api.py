@@ -1,5 +1,11 @@
+from utils import startup_profile
+
+startup_profile.start()
+
 from fastapi import FastAPI, Request
-from api.users import get_users, get_user, add_user, delete_user, update_user
+
+with startup_profile.phase("open user store"):
+    from api.users import get_users, get_user, add_user, delete_user, update_user
 
 app = FastAPI()
 
@@ -29,3 +35,12 @@ def remove_user(user_id: int):
 async def modify_user(request: Request):
     data = await request.json()
     return update_user(data)
+
+
+if __name__ == "__main__":
+    # Usually started with `uvicorn users_api:app`; running the file directly
+    # serves on the port servers/users_api_server.py expects.
+    startup_profile.report_and_exit("users_api")
+    import uvicorn
+
+    uvicorn.run(app, host="127.0.0.1", port=8000)
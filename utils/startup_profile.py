@@ -0,0 +1,103 @@
+"""
+Startup profiling shared by the clients, the users API and the MCP servers.
+
+An entry point calls start() before its other imports and report_and_exit()
+once initialisation is done. Both are no-ops unless the process was started
+with --profile-startup; in that case every import made directly by the entry
+point (including lazy imports inside functions) is timed, phase() blocks are
+timed, and report_and_exit() prints the breakdown and exits instead of
+serving. Only the standard library is imported here so that importing this
+module does not itself distort the numbers.
+"""
+from contextlib import contextmanager
+from typing import List, Tuple
+import builtins
+import sys
+import time
+
+PROFILE_FLAG = "--profile-startup"
+
+# Imports that took less than this are left out of the report.
+MIN_REPORTED_SECONDS = 0.001
+
+_started_at = None
+_imports: List[Tuple[str, float]] = []
+_phases: List[Tuple[str, float]] = []
+_import_depth = 0
+_original_import = builtins.__import__
+
+
+def enabled() -> bool:
+    return PROFILE_FLAG in sys.argv
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """Times outermost imports only, so each module's cost includes everything it pulls in."""
+    global _import_depth
+    if _import_depth:
+        return _original_import(name, globals, locals, fromlist, level)
+    _import_depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _import_depth -= 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_REPORTED_SECONDS:
+            _imports.append(("." * level + name, elapsed))
+
+
+def start():
+    """Starts profiling if --profile-startup was passed. Call before any heavy import."""
+    global _started_at
+    if not enabled() or _started_at is not None:
+        return
+    _started_at = time.perf_counter()
+    builtins.__import__ = _timed_import
+
+
+@contextmanager
+def phase(name: str):
+    """Times an initialisation phase when profiling; does nothing otherwise."""
+    if _started_at is None:
+        yield
+        return
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, time.perf_counter() - start_time))
+
+
+def report_and_exit(name: str):
+    """Prints the import and phase breakdown for `name` and exits, when profiling."""
+    if _started_at is None:
+        return
+    total = time.perf_counter() - _started_at
+    builtins.__import__ = _original_import
+
+    print(f"\n--- Startup profile: {name} ---")
+    print(f"Total since profiler start: {total * 1000:.1f} ms "
+          f"(process uptime incl. interpreter start: {_process_uptime_ms()})")
+    print("\nImports (outermost, slowest first):")
+    for module, seconds in sorted(_imports, key=lambda item: item[1], reverse=True):
+        print(f"  {seconds * 1000:9.1f} ms  {module}")
+    print(f"  {sum(s for _, s in _imports) * 1000:9.1f} ms  total")
+    if _phases:
+        print("\nInit phases:")
+        for phase_name, seconds in _phases:
+            print(f"  {seconds * 1000:9.1f} ms  {phase_name}")
+    sys.exit(0)
+
+
+def _process_uptime_ms() -> str:
+    """Best-effort time since the process was created (Linux only)."""
+    try:
+        import os
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return f"{(uptime - start_ticks / os.sysconf('SC_CLK_TCK')) * 1000:.0f} ms"
+    except (OSError, ValueError, IndexError, AttributeError):
+        return "n/a"
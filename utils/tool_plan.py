@@ -0,0 +1,157 @@
+from typing import List, Dict, Any, Set
+import asyncio
+import json
+import re
+
+# A string argument of the form "$step_id.field.subfield" is replaced by that
+# field of the named step's result before the tool is called.
+REFERENCE_PATTERN = re.compile(r"^\$([A-Za-z_][A-Za-z0-9_]*)((?:\.[A-Za-z0-9_]+)*)$")
+
+
+class PlanError(Exception):
+    """Raised when a tool plan is malformed or cannot be executed."""
+
+
+def parse_plan(text: str) -> List[Dict[str, Any]]:
+    """
+    Parses the LLM's plan output into a list of steps. The expected shape is
+    {"steps": [{"id": ..., "tool": ..., "args": {...}}, ...]}; a bare list of
+    steps and a surrounding ```json fence are tolerated. An empty list means
+    no tool is needed.
+    """
+    if not isinstance(text, str):
+        raise PlanError(f"Plan must be text, got {type(text).__name__}")
+    text = text.strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```[a-zA-Z]*\s*|\s*```$", "", text)
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise PlanError(f"Plan is not valid JSON: {e}")
+
+    steps = data.get("steps") if isinstance(data, dict) else data
+    if not isinstance(steps, list):
+        raise PlanError("Plan must contain a list of steps")
+    for step in steps:
+        if not isinstance(step, dict) or "id" not in step or "tool" not in step:
+            raise PlanError(f"Each step needs an 'id' and a 'tool': {step}")
+        if not isinstance(step["id"], str) or not isinstance(step["tool"], str):
+            raise PlanError(f"Step 'id' and 'tool' must be strings: {step}")
+        step.setdefault("args", {})
+        if not isinstance(step["args"], dict):
+            raise PlanError(f"Step '{step['id']}' args must be an object")
+    return steps
+
+
+def find_references(value: Any) -> Set[str]:
+    """Returns the ids of all steps referenced anywhere inside an argument value."""
+    if isinstance(value, str):
+        match = REFERENCE_PATTERN.match(value)
+        return {match.group(1)} if match else set()
+    if isinstance(value, dict):
+        return set().union(*(find_references(v) for v in value.values()))
+    if isinstance(value, list):
+        return set().union(*(find_references(v) for v in value))
+    return set()
+
+
+def validate_plan(steps: List[Dict[str, Any]], tool_names: Set[str]) -> Dict[str, Set[str]]:
+    """
+    Checks tool names, step ids and references, rejects cycles, and returns
+    the dependency set of every step.
+    """
+    ids = [step["id"] for step in steps]
+    if len(ids) != len(set(ids)):
+        raise PlanError("Step ids must be unique")
+
+    dependencies = {}
+    for step in steps:
+        if step["tool"] not in tool_names:
+            raise PlanError(f"Step '{step['id']}' uses unknown tool '{step['tool']}'")
+        deps = find_references(step["args"])
+        unknown = deps - set(ids)
+        if unknown:
+            raise PlanError(f"Step '{step['id']}' references unknown steps: {sorted(unknown)}")
+        dependencies[step["id"]] = deps
+
+    # Kahn's algorithm: anything left unvisited is part of a cycle.
+    remaining = {step_id: set(deps) for step_id, deps in dependencies.items()}
+    while remaining:
+        ready = [step_id for step_id, deps in remaining.items() if not deps]
+        if not ready:
+            raise PlanError(f"Plan has a dependency cycle between steps: {sorted(remaining)}")
+        for step_id in ready:
+            del remaining[step_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return dependencies
+
+
+def _as_data(result: Any) -> Any:
+    """MCP tools usually return JSON as text; decode it so fields can be referenced."""
+    if isinstance(result, str):
+        try:
+            return json.loads(result)
+        except json.JSONDecodeError:
+            return result
+    return result
+
+
+def resolve_arguments(value: Any, results: Dict[str, Any]) -> Any:
+    """Replaces every "$step.path" reference in an argument value with the referenced data."""
+    if isinstance(value, str):
+        match = REFERENCE_PATTERN.match(value)
+        if not match:
+            return value
+        data = _as_data(results[match.group(1)])
+        for key in filter(None, match.group(2).split(".")):
+            if isinstance(data, list) and key.isdigit() and int(key) < len(data):
+                data = data[int(key)]
+            elif isinstance(data, dict) and key in data:
+                data = data[key]
+            else:
+                raise PlanError(f"Reference '{value}' could not be resolved: no field '{key}'")
+        return data
+    if isinstance(value, dict):
+        return {k: resolve_arguments(v, results) for k, v in value.items()}
+    if isinstance(value, list):
+        return [resolve_arguments(v, results) for v in value]
+    return value
+
+
+async def execute_plan(steps: List[Dict[str, Any]], tools: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Runs a validated plan against the given tools (name -> tool with an
+    async `ainvoke`). Each step starts as soon as the steps it references have
+    finished, so independent branches run in parallel. Returns a record per
+    step id with the resolved args and either its result or its error; steps
+    whose dependencies failed are reported as skipped rather than run.
+    """
+    dependencies = validate_plan(steps, set(tools))
+    results: Dict[str, Any] = {}
+    records: Dict[str, Dict[str, Any]] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run_step(step: Dict[str, Any]):
+        step_id = step["id"]
+        deps = dependencies[step_id]
+        await asyncio.gather(*(tasks[d] for d in deps))
+        record = {"tool": step["tool"], "args": step["args"], "result": None, "error": None}
+        records[step_id] = record
+
+        failed = sorted(d for d in deps if records[d]["error"])
+        if failed:
+            record["error"] = f"Skipped because dependencies failed: {failed}"
+            return
+        try:
+            record["args"] = resolve_arguments(step["args"], results)
+            results[step_id] = await tools[step["tool"]].ainvoke(record["args"])
+            record["result"] = results[step_id]
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+
+    # Tasks are created before any of them runs, so every dependency lookup succeeds.
+    for step in steps:
+        tasks[step["id"]] = asyncio.ensure_future(run_step(step))
+    await asyncio.gather(*tasks.values())
+    return {step["id"]: records[step["id"]] for step in steps}